@@ -1,23 +1,23 @@
 #!/usr/bin/env python3
-import re
 import sys
 from pathlib import Path
 
+import numpy as np
 from gurobipy import GRB
 
 from health_center_instance import (
+    ASSIGNMENT_RE,
     HealthCenterInstancePartOne,
-    Distances,
+    get_distances,
     CombinedTerminationCallback,
 )
 from model_part_one import build_part_one_model
 
 
 def load_initial_solution(path: Path) -> dict[int, list[int]]:
-    pattern = r"Healthcenter deployed at (\d+): Communities Assigned = \{([0-9,\s]*)\}"
     init: dict[int, list[int]] = {}
     for line in path.read_text().splitlines():
-        m = re.search(pattern, line)
+        m = ASSIGNMENT_RE.search(line)
         if not m:
             continue
         center = int(m.group(1)) - 1
@@ -30,49 +30,53 @@ def load_initial_solution(path: Path) -> dict[int, list[int]]:
 def continue_instance(inst_path: Path, init_path: Path, out_path: Path) -> None:
     inst = HealthCenterInstancePartOne(str(inst_path))
     init = load_initial_solution(init_path)
-    model = build_part_one_model(inst)
-    model.update()
+    model, variables = build_part_one_model(inst, warm_start=False)
     N = inst.num_communities
-    for i in range(N):
-        x_var = model.getVarByName(f"x[{i}]")
-        x_var.Start = 1 if i in init else 0
-        for j in range(N):
-            y_var = model.getVarByName(f"y[{i},{j}]")
-            y_var.Start = 1 if j in init.get(i, []) else 0
-    model.update()
+    x, y = variables["x"], variables["y"]
+    x_start = np.zeros(N, dtype=np.int8)
+    x_start[list(init)] = 1
+    y_start = np.zeros((N, N), dtype=np.int8)
+    for i, assigned in init.items():
+        y_start[i, assigned] = 1
+    x.Start = x_start
+    y.Start = y_start
     model.optimize(CombinedTerminationCallback())
     if model.status not in (GRB.OPTIMAL, GRB.INTERRUPTED):
         sys.exit("no solution found or interrupted")
-    deployed = [i for i in range(N) if model.getVarByName(f"x[{i}]").X > 0.5]
-    assignment = {i: [] for i in deployed}
+    X = x.X > 0.5
+    Y = y.X > 0.5
+    deployed = np.flatnonzero(X).tolist()
+    assignment = {i: np.flatnonzero(Y[i]).tolist() for i in deployed}
+    obj_val = variables["D"].X
+    pop = inst.population
+    workloads = Y[deployed] @ pop
+    wl_min, wl_max = workloads.min(), workloads.max()
+    alpha = round(int(pop.sum()) / (5 * inst.num_health_centers))
+    dist_mat = get_distances(inst).as_array()
+    dists = dist_mat[deployed][Y[deployed]]
+    d_min, d_max = dists.min(), dists.max()
+    beta = get_distances(inst).beta()
+    lines = []
     for i in deployed:
-        for j in range(N):
-            if model.getVarByName(f"y[{i},{j}]").X > 0.5:
-                assignment[i].append(j)
-    obj_val = model.getVarByName("D").X
-    pop = [node["population"] for node in inst.nodes]
-    workloads = [sum(pop[j] for j in assignment[i]) for i in deployed]
-    wl_min, wl_max = min(workloads), max(workloads)
-    alpha = round(sum(pop) / (5 * inst.num_health_centers))
-    dist = Distances(inst)
-    dists = [dist[i, j] for i in deployed for j in assignment[i]]
-    d_min, d_max = min(dists), max(dists)
-    beta = max(dist[i, j] for i in range(N) for j in range(i)) / 5
-    with open(out_path, "w") as f:
-        for i in deployed:
-            comms = ", ".join(str(j + 1) for j in sorted(assignment[i]))
-            f.write(
-                f"Healthcenter deployed at {i + 1}: Communities Assigned = {{{comms}}}\n"
-            )
-        f.write(f"\nObjective Value: {obj_val:.10f}\n\n")
-        f.write("Workload Fairness Check:\n")
-        f.write(f"  Min workload = {wl_min:.2f}, Max workload = {wl_max:.2f}\n")
-        f.write(
-            f"  Workload Gap = {wl_max - wl_min:.2f} (Threshold Alpha = {alpha})\n\n"
+        comms = ", ".join(str(j + 1) for j in assignment[i])
+        lines.append(
+            f"Healthcenter deployed at {i + 1}: Communities Assigned = {{{comms}}}"
         )
-        f.write("Distance Fairness Check:\n")
-        f.write(f"  Min Distance = {d_min:.2f}, Max Distance = {d_max:.2f}\n")
-        f.write(f"  Distance Gap = {d_max - d_min:.2f} (Threshold Beta = {beta})\n")
+    lines += [
+        "",
+        f"Objective Value: {obj_val:.10f}",
+        "",
+        "Workload Fairness Check:",
+        f"  Min workload = {wl_min:.2f}, Max workload = {wl_max:.2f}",
+        f"  Workload Gap = {wl_max - wl_min:.2f} (Threshold Alpha = {alpha})",
+        "",
+        "Distance Fairness Check:",
+        f"  Min Distance = {d_min:.2f}, Max Distance = {d_max:.2f}",
+        f"  Distance Gap = {d_max - d_min:.2f} (Threshold Beta = {beta})",
+        "",
+    ]
+    with open(out_path, "w") as f:
+        f.write("\n".join(lines))
 
 
 if __name__ == "__main__":
@@ -1,4 +1,8 @@
-from math import sqrt
+import re
+from collections.abc import Sequence
+
+import numpy as np
+from scipy.spatial.distance import pdist, squareform
 
 
 class HealthCenterInstancePartOne:
@@ -6,9 +10,20 @@ class HealthCenterInstancePartOne:
         self.num_communities: int = 0
         self.num_health_centers: int = 0
         self.depot_coords: tuple[float, float] = (0, 0)
-        self.nodes: list[dict] = []
+        # Node data is stored column-wise, one array per field.
+        self.index: np.ndarray = np.empty(0, dtype=np.int64)
+        self.x: np.ndarray = np.empty(0, dtype=np.float64)
+        self.y: np.ndarray = np.empty(0, dtype=np.float64)
+        self.capacity: np.ndarray = np.empty(0, dtype=np.int64)
+        self.population: np.ndarray = np.empty(0, dtype=np.int64)
+        self.coords: np.ndarray = np.empty((0, 2), dtype=np.float64)
+        self._distances: "Distances | None" = None
         _parse_instance_file(self, file_path)
 
+    @property
+    def nodes(self) -> "_NodeView":
+        return _NodeView(self)
+
     def __str__(self) -> str:
         return (
             f"HealthCenterInstance with {self.num_communities} communities and "
@@ -28,7 +43,14 @@ class HealthCenterInstancePartTwo:
         self.num_communities: int = 0
         self.num_health_centers: int = 0
         self.depot_coords: tuple[float, float] = (0, 0)
-        self.nodes: list[dict] = []
+        # Node data is stored column-wise, one array per field.
+        self.index: np.ndarray = np.empty(0, dtype=np.int64)
+        self.x: np.ndarray = np.empty(0, dtype=np.float64)
+        self.y: np.ndarray = np.empty(0, dtype=np.float64)
+        self.capacity: np.ndarray = np.empty(0, dtype=np.int64)
+        self.population: np.ndarray = np.empty(0, dtype=np.int64)
+        self.coords: np.ndarray = np.empty((0, 2), dtype=np.float64)
+        self._distances: "Distances | None" = None
         # The logic is as follows:
         # 1. The depot is always at index 0.
         # 2. The first key is just to represent the healthcare units' arbitrary index.
@@ -38,6 +60,10 @@ class HealthCenterInstancePartTwo:
         _parse_instance_file(self, instance_file_path)
         _parse_solution_file(self, solution_file_path)
 
+    @property
+    def nodes(self) -> "_NodeView":
+        return _NodeView(self)
+
     def __str__(self) -> str:
         return (
             f"HealthCenterInstance with {self.num_communities} communities and "
@@ -57,6 +83,23 @@ class HealthCenterInstancePartTwo:
         )
 
 
+# One "Healthcenter deployed at i: Communities Assigned = {...}" line of a
+# part-one solution file; group 1 is the center, group 2 the community list.
+ASSIGNMENT_RE = re.compile(
+    r"Healthcenter deployed at (\d+): Communities Assigned = \{([0-9,\s]*)\}"
+)
+
+_NODE_DTYPE = np.dtype(
+    [
+        ("index", np.int64),
+        ("x", np.float64),
+        ("y", np.float64),
+        ("capacity", np.int64),
+        ("population", np.int64),
+    ]
+)
+
+
 def _parse_instance_file(
     instance: HealthCenterInstancePartOne | HealthCenterInstancePartTwo,
     instance_file_path: str,
@@ -81,17 +124,38 @@ def _parse_instance_file(
     else:  # new format
         instance.depot_coords = None  # no depot
 
-    for line in lines[start:]:
-        idx, x, y, cap, pop = line.split()
-        instance.nodes.append(
-            {
-                "index": int(idx),
-                "x": float(x),
-                "y": float(y),
-                "capacity": int(cap),
-                "population": int(pop),
-            }
-        )
+    data = np.loadtxt(lines[start:], dtype=_NODE_DTYPE, ndmin=1)
+    instance.index = np.ascontiguousarray(data["index"])
+    instance.x = np.ascontiguousarray(data["x"])
+    instance.y = np.ascontiguousarray(data["y"])
+    instance.capacity = np.ascontiguousarray(data["capacity"])
+    instance.population = np.ascontiguousarray(data["population"])
+    instance.coords = np.column_stack((instance.x, instance.y))
+
+
+class _NodeView(Sequence):
+    """
+    Row-wise view of the node arrays, kept for printing and older callers.
+    Each node dict is built only when it is accessed.
+    """
+
+    def __init__(
+        self, instance: HealthCenterInstancePartOne | HealthCenterInstancePartTwo
+    ):
+        self._instance = instance
+
+    def __len__(self) -> int:
+        return len(self._instance.index)
+
+    def __getitem__(self, k: int) -> dict:
+        inst = self._instance
+        return {
+            "index": inst.index[k].item(),
+            "x": inst.x[k].item(),
+            "y": inst.y[k].item(),
+            "capacity": inst.capacity[k].item(),
+            "population": inst.population[k].item(),
+        }
 
 
 def _parse_solution_file(
@@ -104,44 +168,76 @@ def _parse_solution_file(
     index = 1
     with open(solution_file_path, "r") as file:
         for line in file:
-            if "Healthcenter deployed at" in line:
-                parts = (
-                    line.strip().split("Healthcenter deployed at")[1].strip().split(":")
-                )
-                center_index = int(parts[0])
-                assigned_str = parts[1].split("=")[-1].strip().strip("{}")
-                assigned_indices = list(map(int, assigned_str.split(", ")))
+            m = ASSIGNMENT_RE.search(line)
+            if m:
+                center_index = int(m.group(1))
+                assigned_indices = np.fromstring(
+                    m.group(2), dtype=np.int64, sep=","
+                ).tolist()
                 instance.assignments[index] = (center_index, assigned_indices)
                 index += 1
+            elif "Healthcenter deployed at" in line:
+                # skipping it would silently drop the center from part two
+                raise ValueError(
+                    f"Malformed assignment line in {solution_file_path}: "
+                    f"{line.strip()!r}"
+                )
             elif "Objective Value" in line:
                 break
 
 
 class Distances:
-    def __init__(
-        self, instance: HealthCenterInstancePartOne | HealthCenterInstancePartTwo
-    ) -> None:
-        if isinstance(instance, HealthCenterInstancePartTwo):
-            self._coordinates = {
-                node["index"]: (node["x"], node["y"]) for node in instance.nodes
-            }
-            self._coordinates[0] = instance.depot_coords
-        else:
-            self._coordinates = {
-                node["index"] - 1: (node["x"], node["y"]) for node in instance.nodes
-            }
-        self.distances = {
-            (i, j): sqrt(
-                (self._coordinates[i][0] - self._coordinates[j][0]) ** 2
-                + (self._coordinates[i][1] - self._coordinates[j][1]) ** 2
-            )
-            for i in self._coordinates
-            for j in self._coordinates
-        }
+    def __init__(self, coordinates: np.ndarray) -> None:
+        # pdist computes each unordered pair once; squareform mirrors it.
+        self.distances: np.ndarray = squareform(pdist(coordinates))
+
+    @classmethod
+    def from_part_one(cls, instance: HealthCenterInstancePartOne) -> "Distances":
+        """
+        Row/column k of the matrix is community index k + 1.
+        """
+        return cls(instance.coords)
+
+    @classmethod
+    def from_part_two(cls, instance: HealthCenterInstancePartTwo) -> "Distances":
+        """
+        Row/column k of the matrix is community index k, with the depot at 0.
+        """
+        return cls(np.vstack((instance.depot_coords, instance.coords)))
+
+    def as_array(self) -> np.ndarray:
+        """
+        The full distance matrix as a contiguous float64 array, for
+        vectorized use instead of element-wise indexing.
+        """
+        return self.distances
 
     def __getitem__(self, key: tuple[int, int]) -> float:
         return self.distances[key]
 
+    def beta(self) -> float:
+        """
+        Distance fairness threshold, a fifth of the largest pairwise
+        distance. The matrix is symmetric with a zero diagonal, so its full
+        max is the max over i > j.
+        """
+        return float(self.distances.max()) / 5
+
+
+def get_distances(
+    instance: HealthCenterInstancePartOne | HealthCenterInstancePartTwo,
+) -> Distances:
+    """
+    Returns the distances of an instance, computing them on first use only.
+    Instances are not modified after parsing, so the cache never goes stale.
+    """
+    if instance._distances is None:
+        if isinstance(instance, HealthCenterInstancePartTwo):
+            instance._distances = Distances.from_part_two(instance)
+        else:
+            instance._distances = Distances.from_part_one(instance)
+    return instance._distances
+
 
 import gurobipy as gp
 
@@ -155,6 +251,9 @@ class CustomTerminationCallback:
         self.mip_gap_threshold = mip_gap_threshold  # 25% gap
         self.last_improvement_time = time.time()
         self.best_obj = float("inf")
+        # Incumbent and bound seen on the previous call
+        self._last_bst: float | None = None
+        self._last_bnd: float | None = None
 
     def __call__(self, model, where):
         if where == GRB.Callback.MIP:
@@ -165,8 +264,12 @@ class CustomTerminationCallback:
             except gp.GurobiError:
                 return  # In case attributes are not available yet
 
+            # Improvement and gap only depend on the incumbent and bound
+            changed = best_obj != self._last_bst or best_bound != self._last_bnd
+            self._last_bst, self._last_bnd = best_obj, best_bound
+
             # Check for improvement
-            if best_obj < self.best_obj * (1 - self.improvement_threshold):
+            if changed and best_obj < self.best_obj * (1 - self.improvement_threshold):
                 self.best_obj = best_obj
                 self.last_improvement_time = current_time
 
@@ -176,8 +279,9 @@ class CustomTerminationCallback:
                 model.terminate()
 
             # Check MIP gap
-            if abs(best_obj) > 1e-10:  # Avoid division by zero
-                mip_gap = abs(best_obj - best_bound) / abs(best_obj)
+            abs_obj = abs(best_obj)
+            if changed and abs_obj > 1e-10:  # Avoid division by zero
+                mip_gap = abs(best_obj - best_bound) / abs_obj
                 if mip_gap <= self.mip_gap_threshold:
                     print(f"Terminating: MIP gap {mip_gap:.2%} is within threshold.")
                     model.terminate()
@@ -244,6 +348,8 @@ class CombinedTerminationCallback:
         self.first_solution_time: float | None = None
         self.best_obj: float = float("inf")
         self.last_improve_time: float | None = None
+        self._last_bst: float | None = None
+        self._last_bnd: float | None = None
 
     def __call__(self, model: gp.Model, where: int):
         if where != GRB.Callback.MIP:
@@ -267,15 +373,18 @@ class CombinedTerminationCallback:
         if self.first_solution_time is None:
             self.first_solution_time = now
             self.last_improve_time = now
-        # update best & last_improve_time
-        if bst < self.best_obj * (1 - self.improvement_threshold):
-            self.best_obj = bst
-            self.last_improve_time = now
-        # target gap cutoff
-        gap = abs(bst - bnd) / abs(bst)
-        if gap <= self.gap_threshold:
-            model.terminate()
-            return
+        # improvement and gap only change with the incumbent or bound
+        if bst != self._last_bst or bnd != self._last_bnd:
+            self._last_bst, self._last_bnd = bst, bnd
+            # update best & last_improve_time
+            if bst < self.best_obj * (1 - self.improvement_threshold):
+                self.best_obj = bst
+                self.last_improve_time = now
+            # target gap cutoff
+            gap = abs(bst - bnd) / abs(bst)
+            if gap <= self.gap_threshold:
+                model.terminate()
+                return
         # no‐improvement cutoff
         if now - self.last_improve_time >= self.no_improve_time:
             model.terminate()
@@ -1,105 +1,251 @@
 # heuristic.py
 from __future__ import annotations
 
+import multiprocessing
+import time
 from typing import List, Dict, Tuple, Optional
 
-from health_center_instance import HealthCenterInstancePartOne, Distances
+import numpy as np
+from numba import njit
+
+from health_center_instance import HealthCenterInstancePartOne, get_distances
+
+
+@njit(cache=True)
+def _backtrack(
+    idx: int,
+    communities: np.ndarray,
+    dist_mat: np.ndarray,
+    order: np.ndarray,
+    pops: np.ndarray,
+    x: np.ndarray,
+    load: np.ndarray,
+    residual: np.ndarray,
+    assign: np.ndarray,
+    open_centers: np.ndarray,
+    n_open: int,
+    d_min: float,
+    d_max: float,
+    alpha: int,
+    beta: float,
+    cap: int,
+    M: int,
+) -> bool:
+    if idx == communities.shape[0]:
+        return True
+
+    j = communities[idx]
+    # order[j] lists every community by distance to j; walk it to visit the
+    # open centers nearest first
+    n_cand = n_open + 1 if n_open < M else n_open
+    # workload range of the open centers before j is placed
+    min_load = load[open_centers[0]] if n_open > 0 else 0
+    for k in range(1, n_open):
+        min_load = min(min_load, load[open_centers[k]])
+    pos = 0
+    for c in range(n_cand):
+        if c < n_open:
+            i = order[j, pos]
+            while not x[i]:
+                pos += 1
+                i = order[j, pos]
+            pos += 1
+            # i is not the least loaded center, so the minimum stays put
+            # and the gap can only grow past alpha
+            if load[i] > min_load and load[i] + pops[j] - min_load > alpha:
+                continue
+        else:
+            i = j  # option to open new center
+        # the distance range would exceed beta whatever is assigned later
+        dj = dist_mat[i, j]
+        if dj > d_min + beta or dj < d_max - beta:
+            continue
+        opening = False
+        if i == j and not x[i]:  # open new
+            x[i] = True
+            open_centers[n_open] = i
+            residual[i] = cap
+            opening = True
+        n_now = n_open + 1 if opening else n_open
+        # capacity check
+        if residual[i] < pops[j]:
+            if opening:
+                x[i] = False
+            continue
+        # tentative assign
+        assign[j] = i
+        residual[i] -= pops[j]
+        load[i] += pops[j]
+
+        # distance stats update
+        new_dmin = min(d_min, dj)
+        new_dmax = max(d_max, dj)
+
+        # fairness pruning
+        if new_dmax - new_dmin <= beta:
+            w_min = load[open_centers[0]]
+            w_max = w_min
+            for k in range(1, n_now):
+                w = load[open_centers[k]]
+                if w < w_min:
+                    w_min = w
+                elif w > w_max:
+                    w_max = w
+            if w_max - w_min <= alpha:
+                if _backtrack(
+                    idx + 1,
+                    communities,
+                    dist_mat,
+                    order,
+                    pops,
+                    x,
+                    load,
+                    residual,
+                    assign,
+                    open_centers,
+                    n_now,
+                    new_dmin,
+                    new_dmax,
+                    alpha,
+                    beta,
+                    cap,
+                    M,
+                ):
+                    return True
+        # undo
+        residual[i] += pops[j]
+        load[i] -= pops[j]
+        assign[j] = -1
+        if opening:
+            residual[i] = 0
+            x[i] = False
+    return False
 
 
 def build_initial_solution(
-    instance: HealthCenterInstancePartOne,
+    instance: HealthCenterInstancePartOne, seed: Optional[int] = None
 ) -> Tuple[List[int], Dict[Tuple[int, int], int]]:
     N = instance.num_communities
     M = instance.num_health_centers
-    pops = [n["population"] for n in instance.nodes]
-    cap = instance.nodes[0]["capacity"]
-    dist = Distances(instance)
+    pops = instance.population
+    cap = int(instance.capacity[0])
+    dist_mat = get_distances(instance).as_array()
 
-    total_pop = sum(pops)
+    total_pop = int(pops.sum())
     alpha = round(total_pop / (5 * M))
-    beta = max(dist[i, j] for i in range(N) for j in range(i)) / 5
+    beta = get_distances(instance).beta()
 
-    communities = sorted(range(N), key=pops.__getitem__, reverse=True)
-
-    x_best: List[int] = []
-    y_best: Dict[Tuple[int, int], int] = {}
+    if seed is None:
+        communities = np.argsort(-pops, kind="stable")
+    else:
+        # same population order, but shuffle communities with equal population
+        tiebreak = np.random.default_rng(seed).permutation(N)
+        communities = np.lexsort((tiebreak, -pops))
+    # the matrix is symmetric, so row j sorted is column j sorted
+    order = np.argsort(dist_mat, axis=1, kind="stable")
 
     # state arrays
-    x = [0] * N
-    load = [0] * N  # current workload per open center
-    residual = [0] * N
-    y: Dict[Tuple[int, int], int] = {}
-
-    open_centers: List[int] = []
-
-    d_min: Optional[float] = None
-    d_max: Optional[float] = None
-
-    def backtrack(idx: int) -> bool:
-        nonlocal d_min, d_max, x_best, y_best
-        if idx == len(communities):
-            x_best = x[:]
-            y_best = dict(y)
-            return True
-
-        j = communities[idx]
-        # generate candidate centers sorted by distance
-        candidates = open_centers[:]
-        candidates.sort(key=lambda i: dist[i, j])
-        if len(open_centers) < M:
-            candidates.append(j)  # option to open new center
-        for i in candidates:
-            opening = False
-            if i == j and x[i] == 0:  # open new
-                x[i] = 1
-                open_centers.append(i)
-                residual[i] = cap
-                opening = True
-            # capacity check
-            if residual[i] < pops[j]:
-                if opening:
-                    open_centers.pop()
-                    x[i] = 0
-                continue
-            # tentative assign
-            y[(i, j)] = 1
-            residual[i] -= pops[j]
-            load[i] += pops[j]
-
-            # distance stats update
-            old_dmin, old_dmax = d_min, d_max
-            dj = dist[i, j]
-            d_min = dj if d_min is None else min(d_min, dj)
-            d_max = dj if d_max is None else max(d_max, dj)
-
-            # fairness pruning
-            if d_max - d_min <= beta:
-                w_vals = [load[c] for c in open_centers]
-                gap = max(w_vals) - min(w_vals) if w_vals else 0
-                if gap <= alpha:
-                    if backtrack(idx + 1):
-                        return True
-            # undo
-            d_min, d_max = old_dmin, old_dmax
-            residual[i] += pops[j]
-            load[i] -= pops[j]
-            y.pop((i, j))
-            if opening:
-                open_centers.pop()
-                residual[i] = 0
-                x[i] = 0
-        return False
-
-    if not backtrack(0):
+    x = np.zeros(N, dtype=np.bool_)  # open-center mask
+    load = np.zeros(N, dtype=np.int64)  # current workload per open center
+    residual = np.zeros(N, dtype=np.int64)
+    assign = np.full(N, -1, dtype=np.int64)  # assign[j] = center serving j
+    open_centers = np.empty(M, dtype=np.int64)
+
+    if not _backtrack(
+        0,
+        communities,
+        dist_mat,
+        order,
+        pops,
+        x,
+        load,
+        residual,
+        assign,
+        open_centers,
+        0,
+        np.inf,
+        -np.inf,
+        alpha,
+        beta,
+        cap,
+        M,
+    ):
         raise ValueError("No feasible solution found by backtracking.")
 
+    x_best = x.astype(np.int64).tolist()
+    y_best = {
+        (i, j): 1 for i, j in zip(assign[communities].tolist(), communities.tolist())
+    }
+    return x_best, y_best
+
+
+_restart_instance: Optional[HealthCenterInstancePartOne] = None
+
+
+def _init_restart_worker(instance: HealthCenterInstancePartOne) -> None:
+    global _restart_instance
+    _restart_instance = instance
+
+
+def _one_restart(
+    seed: Optional[int],
+) -> Optional[Tuple[float, List[int], Dict[Tuple[int, int], int]]]:
+    try:
+        x_init, y_init = build_initial_solution(_restart_instance, seed)
+    except ValueError:
+        return None
+    centers, comms = np.array(list(y_init)).T
+    dist = get_distances(_restart_instance)
+    obj = float((_restart_instance.population[comms] * dist[centers, comms]).max())
+    return obj, x_init, y_init
+
+
+def build_best_initial_solution(
+    instance: HealthCenterInstancePartOne,
+    restarts: int = 8,
+    processes: Optional[int] = None,
+    time_limit: float = 60,
+) -> Tuple[List[int], Dict[Tuple[int, int], int]]:
+    """
+    Runs build_initial_solution from several community orderings in parallel
+    and keeps the one with the smallest max P[j] * dist(i,j). The first run
+    uses the default ordering; the others shuffle communities of equal
+    population. Restarts still searching after time_limit seconds are dropped;
+    if none finished, TimeoutError is raised instead of the ValueError that
+    means every restart failed.
+    """
+    seeds = [None] + list(range(1, restarts))
+    deadline = time.time() + time_limit
+    results = []
+    timed_out = 0
+    with multiprocessing.Pool(
+        processes, initializer=_init_restart_worker, initargs=(instance,)
+    ) as pool:
+        pending = [pool.apply_async(_one_restart, (seed,)) for seed in seeds]
+        for res in pending:
+            try:
+                result = res.get(timeout=max(0.0, deadline - time.time()))
+            except multiprocessing.TimeoutError:
+                timed_out += 1
+                continue
+            if result is not None:
+                results.append(result)
+    if not results:
+        if timed_out:
+            raise TimeoutError(
+                f"{timed_out} of {len(seeds)} restarts hit the {time_limit}s "
+                "limit and none of the others found a feasible solution."
+            )
+        raise ValueError("No feasible solution found by backtracking.")
+    _, x_best, y_best = min(results, key=lambda r: r[0])
     return x_best, y_best
 
 
 def apply_initial_solution_to_model(
     x_vars, y_vars, x_init: List[int], y_init: Dict[Tuple[int, int], int]
 ) -> None:
-    for i, v in enumerate(x_init):
-        x_vars[i].Start = v
-    for i, j in y_vars.keys():
-        y_vars[i, j].Start = 1 if (i, j) in y_init else 0
+    x_vars.Start = x_init
+    y_start = np.zeros(y_vars.shape)
+    if y_init:
+        y_start[tuple(np.array(list(y_init)).T)] = 1
+    y_vars.Start = y_start
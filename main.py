@@ -1,14 +1,18 @@
 #!/usr/bin/env python3
 import argparse
-import re
+import os
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 
+import numpy as np
 from gurobipy import GRB
 
 from health_center_instance import (
+    ASSIGNMENT_RE,
     HealthCenterInstancePartOne,
-    Distances,
+    get_distances,
     CombinedTerminationCallback,
 )
 from model_part_one import build_part_one_model
@@ -27,16 +31,63 @@ parser.add_argument(
     action="store_true",
     help="Enable verbose logging of variables and constraints",
 )
+parser.add_argument(
+    "-workers",
+    type=int,
+    default=None,
+    help="Number of instances solved in parallel (default: one per instance, "
+    "up to the CPU count)",
+)
+parser.add_argument(
+    "-mipfocus",
+    type=int,
+    default=1,
+    help="Gurobi MIPFocus (default: 1, favour finding feasible solutions)",
+)
+parser.add_argument(
+    "-cuts", type=int, default=2, help="Gurobi Cuts (default: 2, aggressive)"
+)
+parser.add_argument(
+    "-symmetry",
+    type=int,
+    default=2,
+    help="Gurobi Symmetry (default: 2, aggressive)",
+)
+parser.add_argument(
+    "-presolve", type=int, default=2, help="Gurobi Presolve (default: 2, aggressive)"
+)
+parser.add_argument(
+    "-heuristics",
+    type=float,
+    default=0.2,
+    help="Gurobi Heuristics, the share of time spent in MIP heuristics "
+    "(default: 0.2)",
+)
+parser.add_argument(
+    "-restarts",
+    type=int,
+    default=0,
+    help="Warm start fresh solves from the best of this many backtracking "
+    "heuristic restarts (default: 0, use the greedy start)",
+)
 args = parser.parse_args()
 INSTANCE_IDS = args.instances if args.instances else [11]
 VERBOSE = args.verbose
+WORKERS = args.workers
+RESTARTS = args.restarts
+SOLVER_PARAMS = {
+    "MIPFocus": args.mipfocus,
+    "Cuts": args.cuts,
+    "Symmetry": args.symmetry,
+    "Presolve": args.presolve,
+    "Heuristics": args.heuristics,
+}
 
 
 def load_initial_solution(path: Path) -> dict[int, list[int]]:
-    pattern = r"Healthcenter deployed at (\d+): Communities Assigned = \{([0-9,\s]*)\}"
     init: dict[int, list[int]] = {}
     for line in path.read_text().splitlines():
-        m = re.search(pattern, line)
+        m = ASSIGNMENT_RE.search(line)
         if not m:
             continue
         center = int(m.group(1)) - 1
@@ -46,54 +97,103 @@ def load_initial_solution(path: Path) -> dict[int, list[int]]:
     return init
 
 
-def continue_instance(inst_path: Path, init_path: Path, out_path: Path) -> None:
+def continue_instance(
+    inst_path: Path, init_path: Path, out_path: Path, threads: int = 0
+) -> None:
     inst = HealthCenterInstancePartOne(str(inst_path))
     init = load_initial_solution(init_path)
-    model = build_part_one_model(inst)
-    model.update()
+    model, variables = build_part_one_model(inst, warm_start=False)
     N = inst.num_communities
-    for i in range(N):
-        x_var = model.getVarByName(f"x[{i}]")
-        x_var.Start = 1 if i in init else 0
-        for j in range(N):
-            y_var = model.getVarByName(f"y[{i},{j}]")
-            y_var.Start = 1 if j in init.get(i, []) else 0
-    model.update()
+    x_start = np.zeros(N, dtype=np.int8)
+    x_start[list(init)] = 1
+    y_start = np.zeros((N, N), dtype=np.int8)
+    for i, assigned in init.items():
+        y_start[i, assigned] = 1
+    variables["x"].Start = x_start
+    variables["y"].Start = y_start
+    _set_solver_params(model, threads)
     model.optimize(CombinedTerminationCallback())
     if model.status not in (GRB.OPTIMAL, GRB.INTERRUPTED):
         sys.exit("no solution found or interrupted")
-    _write_solution(inst, model, out_path)
+    if VERBOSE:
+        _print_model_values(model)
+    _write_solution(inst, variables, out_path)
 
 
-def solve_instance(inst_path: Path, output_path: Path) -> None:
+def solve_instance(inst_path: Path, output_path: Path, threads: int = 0) -> None:
     inst = HealthCenterInstancePartOne(str(inst_path))
-    model = build_part_one_model(inst)
+    model, variables = build_part_one_model(
+        inst,
+        heuristic_restarts=RESTARTS,
+        heuristic_processes=threads or _available_cpus(),
+    )
+    _set_solver_params(model, threads)
     model.optimize(CombinedTerminationCallback())
     if model.status not in (GRB.OPTIMAL, GRB.INTERRUPTED):
         print(f"{inst_path.name}: no solution")
         return
-    _write_solution(inst, model, output_path)
+    if VERBOSE:
+        _print_model_values(model)
+    _write_solution(inst, variables, output_path)
+
+
+def _set_solver_params(model, threads: int) -> None:
+    model.setParam("Threads", threads)
+    for name, value in SOLVER_PARAMS.items():
+        model.setParam(name, value)
+
+
+_SENSE_SYMBOLS = {GRB.LESS_EQUAL: "<=", GRB.GREATER_EQUAL: ">=", GRB.EQUAL: "=="}
+
+
+def _print_model_values(model) -> None:
+    """
+    Prints every variable value, then every constraint with its terms, its
+    left-hand side at the solution and its slack. Values are fetched with
+    batched getAttr calls and the terms are read from the sparse constraint
+    matrix, so nothing is queried per variable or per term.
+    """
+    model_vars = model.getVars()
+    constrs = model.getConstrs()
+    var_names = model.getAttr("VarName", model_vars)
+    values = np.asarray(model.getAttr("X", model_vars))
+    A = model.getA().tocsr()
+    lhs = A @ values
+    constr_names = model.getAttr("ConstrName", constrs)
+    senses = model.getAttr("Sense", constrs)
+    rhs = model.getAttr("RHS", constrs)
+    slack = model.getAttr("Slack", constrs)
+    lines = [f"{name} = {v}" for name, v in zip(var_names, values.tolist())]
+    for k in range(len(constrs)):
+        lo, hi = A.indptr[k], A.indptr[k + 1]
+        expr = " + ".join(
+            f"{a} {var_names[c]}"
+            for a, c in zip(A.data[lo:hi].tolist(), A.indices[lo:hi].tolist())
+        )
+        lines.append(
+            f"{constr_names[k]}: {expr} {_SENSE_SYMBOLS[senses[k]]} {rhs[k]} "
+            f"(lhs = {lhs[k]}, slack = {slack[k]})"
+        )
+    print("\n".join(lines))
 
 
 def _write_solution(
-    inst: HealthCenterInstancePartOne, model, output_path: Path
+    inst: HealthCenterInstancePartOne, variables: dict, output_path: Path
 ) -> None:
-    N = inst.num_communities
-    deployed = [i for i in range(N) if model.getVarByName(f"x[{i}]").X > 0.5]
-    assignment = {i: [] for i in deployed}
-    for i in deployed:
-        for j in range(N):
-            if model.getVarByName(f"y[{i},{j}]").X > 0.5:
-                assignment[i].append(j)
-    obj_val = model.getVarByName("D").X
-    pop = [node["population"] for node in inst.nodes]
-    workloads = [sum(pop[j] for j in assignment[i]) for i in deployed]
-    wl_min, wl_max = min(workloads), max(workloads)
-    alpha = round(sum(pop) / (5 * inst.num_health_centers))
-    dist = Distances(inst)
-    dists = [dist[i, j] for i in deployed for j in assignment[i]]
-    d_min, d_max = min(dists), max(dists)
-    beta = max(dist[i, j] for i in range(N) for j in range(i)) / 5
+    x, y = variables["x"], variables["y"]
+    deployed = np.flatnonzero(x.X > 0.5).tolist()
+    # y is only read for the deployed centers
+    Y = y[deployed].X > 0.5
+    assignment = {i: np.flatnonzero(row).tolist() for i, row in zip(deployed, Y)}
+    obj_val = variables["D"].X
+    pop = inst.population
+    workloads = Y @ pop
+    wl_min, wl_max = workloads.min(), workloads.max()
+    alpha = round(int(pop.sum()) / (5 * inst.num_health_centers))
+    dist_mat = get_distances(inst).as_array()
+    dists = dist_mat[deployed][Y]
+    d_min, d_max = dists.min(), dists.max()
+    beta = get_distances(inst).beta()
     with open(output_path, "w") as f:
         for i in deployed:
             comms = ", ".join(str(j + 1) for j in sorted(assignment[i]))
@@ -111,22 +211,44 @@ def _write_solution(
         f.write(f"  Distance Gap = {d_max - d_min:.2f} (Threshold Beta = {beta})\n")
 
 
+def _available_cpus() -> int:
+    """
+    Cores this process may run on, which under a scheduler such as slurm is
+    the job's allocation rather than every core of the host.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
 def main() -> None:
     instances_dir = Path("FINAL_ROUND_INSTANCES_OPTCHAL2025")
     if not instances_dir.is_dir():
         print("instances directory not found")
         sys.exit(1)
-    for idx in INSTANCE_IDS:
-        inst_path = instances_dir / f"Instance_{idx}.txt"
-        sol_path = instances_dir / f"Sol_Instance_{idx}.txt"
-        print(f"Processing {inst_path.name}…")
-        if sol_path.exists():
-            print("Existing solution found. Continuing optimization.")
-            continue_instance(inst_path, sol_path, sol_path)
-        else:
-            print("No existing solution. Running fresh optimization.")
-            solve_instance(inst_path, sol_path)
-        print(f"Saved → {sol_path.name}")
+    cpus = _available_cpus()
+    workers = WORKERS or min(len(INSTANCE_IDS), cpus)
+    # Split the cores between the instances being solved at the same time.
+    threads = max(1, cpus // workers)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        list(
+            executor.map(
+                _process_instance, INSTANCE_IDS, repeat(instances_dir), repeat(threads)
+            )
+        )
+
+
+def _process_instance(idx: int, instances_dir: Path, threads: int) -> None:
+    inst_path = instances_dir / f"Instance_{idx}.txt"
+    sol_path = instances_dir / f"Sol_Instance_{idx}.txt"
+    print(f"Processing {inst_path.name}…")
+    if sol_path.exists():
+        print("Existing solution found. Continuing optimization.")
+        continue_instance(inst_path, sol_path, sol_path, threads)
+    else:
+        print("No existing solution. Running fresh optimization.")
+        solve_instance(inst_path, sol_path, threads)
+    print(f"Saved → {sol_path.name}")
 
 
 if __name__ == "__main__":
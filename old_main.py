@@ -1,3 +1,4 @@
+import numpy as np
 from gurobipy import GRB
 
 from health_center_instance import (
@@ -14,31 +15,24 @@ def _solve_and_save_results_part_one(instance_index: int) -> None:
     print("Creating model for instance:", instance_index)
     instance = HealthCenterInstancePartOne(f"instances/Instance_{instance_index}.txt")
     print("Building model...")
-    model = build_part_one_model(instance)
+    model, variables = build_part_one_model(instance)
     print("Model built successfully.")
     print("Solving...")
     callback = TimeAfterFirstSolutionCallback()
     model.optimize(callback)
 
     if model.status == GRB.OPTIMAL or model.status == GRB.INTERRUPTED:
-        deployed_centers = [
-            i
-            for i in range(instance.num_communities)
-            if model.getVarByName(f"x[{i}]").X > 0.5
-        ]
+        deployed_centers = np.flatnonzero(variables["x"].X > 0.5).tolist()
 
         # Map: center i → assigned communities j
-        assignment_map = {i: [] for i in deployed_centers}
-        for i in deployed_centers:
-            for j in range(instance.num_communities):
-                if model.getVarByName(f"y[{i},{j}]").X > 0.5:
-                    assignment_map[i].append(j)
+        Y = variables["y"].X > 0.5
+        assignment_map = {i: np.flatnonzero(Y[i]).tolist() for i in deployed_centers}
 
         save_results_to_file_part_one(
             f"instances/Sol_Instance_{instance_index}.txt",
             deployed_centers,
             assignment_map,
-            model.getVarByName("D").X,
+            variables["D"].X,
         )
     else:
         print("Model did not solve to optimality.")
@@ -62,31 +56,28 @@ def save_results_to_file_part_one(
         f.write(f"Objective Value: {objective_value}\n")
 
 
-def extract_all_routes(model, M: int) -> list[list[int]]:
-    """Extract all routes by checking every z[0,k] arc from the depot."""
+def extract_all_routes(model, z, M: int) -> list[list[int]]:
+    """Extract all routes by following every z[0,k] arc from the depot."""
+    arcs = (
+        np.asarray(
+            model.getAttr("X", [z[i, j] for i in range(M) for j in range(M)])
+        ).reshape(M, M)
+        > 0.5
+    )
+    np.fill_diagonal(arcs, False)
+    # First outgoing arc of each node, or -1 if it has none.
+    succ = np.where(arcs.any(axis=1), arcs.argmax(axis=1), -1).tolist()
     routes = []
     # All indices: 0 represents depot.
-    for k in range(1, M):
-        var = model.getVarByName(f"z[0,{k}]")
-        if var is not None and var.X > 0.5:
-            route = [0, k]
-            current = k
-            while True:
-                next_node = None
-                # For the current node, find an outgoing arc with value > 0.5.
-                for j in range(M):
-                    if j != current:
-                        var_next = model.getVarByName(f"z[{current},{j}]")
-                        if var_next is not None and var_next.X > 0.5:
-                            next_node = j
-                            break
-                if next_node is None:
-                    break  # In case no outgoing arc is found.
-                route.append(next_node)
-                if next_node == 0:
-                    break  # Completed a cycle back to depot.
-                current = next_node
-            routes.append(route)
+    for k in (np.flatnonzero(arcs[0, 1:]) + 1).tolist():
+        route = [0, k]
+        next_node = succ[k]
+        while next_node != -1:  # In case no outgoing arc is found.
+            route.append(next_node)
+            if next_node == 0:
+                break  # Completed a cycle back to depot.
+            next_node = succ[next_node]
+        routes.append(route)
     return routes
 
 
@@ -138,18 +129,26 @@ def _solve_and_save_results_part_two(instance_index: int) -> None:
         f"instances/Sol_Instance_{instance_index}.txt",
     )
 
-    model = build_part_two_model(instance)
+    model, variables = build_part_two_model(instance)
     callback = TimeAfterFirstSolutionCallback()
     model.optimize(callback)
 
     if model.status == GRB.OPTIMAL or model.status == GRB.INTERRUPTED:
         print("Objective Value:", model.ObjVal)
         M = instance.num_health_centers + 1  # Total nodes including depot.
-        routes = extract_all_routes(model, M)
-
-        # Optionally, print out all decision variables.
-        for v in model.getVars():
-            print(v.VarName, ":", v.X)
+        routes = extract_all_routes(model, variables["z"], M)
+
+        # Optionally, print out the nonzero decision variables.
+        model_vars = model.getVars()
+        names = model.getAttr("VarName", model_vars)
+        values = model.getAttr("X", model_vars)
+        print(
+            "\n".join(
+                f"{name} : {value}"
+                for name, value in zip(names, values)
+                if abs(value) > 1e-6
+            )
+        )
 
         # Write (or overwrite) the Stage-2 results in the solution file.
         append_results_to_file_part_two(
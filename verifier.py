@@ -1,7 +1,36 @@
+import array
+import contextlib
+import io
+import re
 import sys
-from math import sqrt
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict
+
+import numpy as np
+
+try:
+    from scipy.spatial.distance import pdist
+
+    def max_distance(P: np.ndarray) -> float:
+        # pdist computes each unordered pair once, in condensed form
+        return float(pdist(P).max(initial=0.0))
+
+except ImportError:  # scipy is optional here; fall back to a compiled loop
+    from numba import njit, prange
+
+    @njit(parallel=True, cache=True)
+    def max_distance(P: np.ndarray) -> float:
+        n = P.shape[0]
+        row_max = np.zeros(n)
+        for i in prange(n):
+            for j in range(i):
+                d = np.hypot(P[i, 0] - P[j, 0], P[i, 1] - P[j, 1])
+                row_max[i] = max(row_max[i], d)
+        return row_max.max() if n else 0.0
+
 
 INSTANCE_USAGE = """Usage: python verifier.py <instance_file> <solution_file>
 
@@ -13,102 +42,167 @@ HARDCODED = [
     for i in [1, 3, 7, 8, 11, 12, 13, 14, 16, 18, 19]
 ]
 
-
-def parse_instance(path: Path):
-    with path.open() as f:
+# One "Healthcenter deployed at i: Communities Assigned = {...}" line
+ASSIGNMENT_RE = re.compile(r"Healthcenter deployed at\s+(\d+)[^=]*=\s*\{([^}]*)\}")
+
+# One community line: index, coordinates, capacity, population
+NODE_DTYPE = np.dtype(
+    [
+        ("idx", np.int64),
+        ("x", np.float64),
+        ("y", np.float64),
+        ("cap", np.int64),
+        ("pop", np.int64),
+    ]
+)
+
+
+@dataclass
+class Instance:
+    """
+    Everything verify needs from an instance file. Community idx sits at
+    row[idx] of P and pop.
+    """
+
+    n: int
+    m: int
+    C: int
+    P: np.ndarray
+    pop: np.ndarray
+    max_dist: float
+    row: np.ndarray
+
+
+@lru_cache(maxsize=None)
+def parse_instance(path: str) -> Instance:
+    """
+    Parsed once per path; verifying several solutions of the same instance
+    reuses the coordinates and the largest distance. Callers must not modify
+    the result.
+    """
+    with open(path) as f:
         lines = [ln for ln in f if ln.strip()]
     n_comm, m_centers = map(int, lines[0].split())
     start = 1
     if lines[1].split()[0] == "0":
         # old format, skip depot
         start = 2
-    nodes = []  # (idx, x, y, capacity, population)
-    for ln in lines[start:]:
-        idx, x, y, cap, pop = ln.split()
-        nodes.append((int(idx), float(x), float(y), int(cap), int(pop)))
-    capacity = nodes[0][3]  # all same
-    coords = {idx: (x, y) for idx, x, y, _, _ in nodes}
-    # distance dict including self (0)
-    dist = {
-        (i, j): sqrt(
-            (coords[i][0] - coords[j][0]) ** 2 + (coords[i][1] - coords[j][1]) ** 2
-        )
-        for i in coords
-        for j in coords
-    }
-    pop = {idx: p for idx, _, _, _, p in nodes}
-    return n_comm, m_centers, capacity, dist, pop
+    nodes = np.loadtxt(lines[start:], dtype=NODE_DTYPE, ndmin=1)
+    capacity = int(nodes["cap"][0])  # all same
+    ids = nodes["idx"].tolist()
+    P = np.column_stack((nodes["x"], nodes["y"]))
+    # only beta needs more than the assigned pairs, and only their maximum,
+    # so no pairwise matrix is kept
+    max_dist = max_distance(P)
+    # -1 marks ids that are not communities of the instance
+    row = np.full(max(ids) + 1, -1, dtype=np.int64)
+    row[ids] = np.arange(len(ids))
+    pop = nodes["pop"].astype(np.int32)
+    return Instance(n_comm, m_centers, capacity, P, pop, max_dist, row)
 
 
 def parse_solution(path: Path):
-    deployed: List[int] = []
-    assignment: Dict[int, List[int]] = {}
+    # typed buffers, so the ids never become Python ints
+    deployed = array.array("i")
+    assignment: Dict[int, np.ndarray] = {}
     with path.open() as f:
         for ln in f:
-            if ln.startswith("Healthcenter deployed at"):
-                left, right = ln.strip().split(":")
-                center = int(left.split()[-1])
-                comm_str = right.split("=")[-1].strip().strip("{}")
-                comms = [] if not comm_str else list(map(int, comm_str.split(", ")))
+            m = ASSIGNMENT_RE.match(ln)
+            if m:
+                center = int(m.group(1))
+                comm_str = m.group(2).strip()
+                comms = (
+                    np.fromstring(comm_str, sep=",", dtype=np.int32)
+                    if comm_str
+                    else np.empty(0, dtype=np.int32)
+                )
                 deployed.append(center)
                 assignment[center] = comms
             if ln.startswith("Objective Value"):
                 obj_val_reported = float(ln.split(":")[-1])
                 break
-    return deployed, assignment, obj_val_reported
+    return np.frombuffer(deployed, dtype=np.int32), assignment, obj_val_reported
 
 
 def verify(instance_file: str, solution_file: str):
-    n, m, C, dist, pop = parse_instance(Path(instance_file))
+    inst = parse_instance(str(instance_file))
     deployed, assign, obj_rep = parse_solution(Path(solution_file))
 
     # 0. basic sanity checks
-    if len(deployed) > m:
-        print(f"ERROR: Too many centers deployed: {len(deployed)} > {m}")
+    if len(deployed) > inst.m:
+        print(f"ERROR: Too many centers deployed: {len(deployed)} > {inst.m}")
         return
 
-    extra_keys = set(assign.keys()) - set(deployed)
+    deployed_set = set(deployed)
+    extra_keys = assign.keys() - deployed_set
     if extra_keys:
         print(f"ERROR: Assignments to non-deployed centers: {sorted(extra_keys)}")
         return
 
+    # every assigned community, one entry per assignment
+    flat = (
+        np.concatenate(list(assign.values())) if assign else np.empty(0, dtype=np.int32)
+    )
+    # ids outside the instance would index the wrong row of P
+    ids = np.concatenate((deployed, flat))
+    known = (ids > 0) & (ids < inst.row.size)
+    known[known] = inst.row[ids[known]] >= 0
+    if not known.all():
+        print(f"ERROR: Unknown community ids: {np.unique(ids[~known]).tolist()}")
+        return
+
     # 1. uniqueness & completeness
-    all_assigned = [c for lst in assign.values() for c in lst]
-    if len(set(all_assigned)) != n:
+    # np.unique sorts, so a complete assignment is exactly 1..n
+    assigned, counts = np.unique(flat, return_counts=True)
+    expected = np.arange(1, inst.n + 1)
+    if not np.array_equal(assigned, expected):
         print("ERROR: Some communities missing or duplicated in assignments.")
-        missing = set(range(1, n + 1)) - set(all_assigned)
-        dup = [c for c in all_assigned if all_assigned.count(c) > 1]
-        if missing:
-            print("Missing:", sorted(missing))
-        if dup:
-            print("Duplicates:", sorted(set(dup)))
+        missing = np.setdiff1d(expected, assigned)
+        out_of_range = np.setdiff1d(assigned, expected)
+        dup = assigned[counts > 1]
+        if missing.size:
+            print("Missing:", missing.tolist())
+        if out_of_range.size:
+            print("Out of range:", out_of_range.tolist())
+        if dup.size:
+            print("Duplicates:", dup.tolist())
         return
 
     # 2. capacity feasibility
-    for i in deployed:
-        load = sum(pop[j] for j in assign[i])
-        if load > C:
-            print(f"ERROR: Capacity exceeded at center {i}: {load} > {C}")
-            return
+    # every (center, community) pair as rows of P
+    sizes = np.array([len(assign[i]) for i in deployed], dtype=np.int64)
+    centers = inst.row[np.repeat(deployed, sizes)]
+    comms = inst.row[np.concatenate([assign[i] for i in deployed])]
+    loads = inst.pop[comms]
+    # the pairs are grouped by center, so each workload is one segment sum;
+    # the trailing 0 keeps a start at the very end in bounds, and centers
+    # with nothing assigned would otherwise pick up the next segment's head.
+    # The same workloads serve the fairness check below.
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    workloads = np.where(sizes > 0, np.add.reduceat(np.r_[loads, 0], starts), 0)
+    over = np.flatnonzero(workloads > inst.C)
+    if over.size:
+        k = over[0]
+        print(
+            f"ERROR: Capacity exceeded at center {deployed[k]}: {workloads[k]} > {inst.C}"
+        )
+        return
 
     # 3. objective value recomputation (max p_j * d(i,j))
-    obj = 0.0
-    for i in deployed:
-        for j in assign[i]:
-            obj = max(obj, pop[j] * dist[i, j])
+    P = inst.P
+    served = np.hypot(P[centers, 0] - P[comms, 0], P[centers, 1] - P[comms, 1])
+    obj = float((loads * served).max(initial=0.0))
     print(f"Reported objective  : {obj_rep:.10f}")
     print(f"Recomputed objective: {obj:.10f}")
 
     # 4. workload fairness
-    workloads = [sum(pop[j] for j in assign[i]) for i in deployed]
-    wl_min, wl_max = min(workloads), max(workloads)
-    alpha = round(sum(pop.values()) / (5 * m))
+    wl_min, wl_max = workloads.min(), workloads.max()
+    alpha = round(float(inst.pop.sum()) / (5 * inst.m))
     print(f"Workload gap        : {wl_max - wl_min} (alpha={alpha})")
 
     # 5. distance fairness metrics
-    dists = [dist[i, j] for i in deployed for j in assign[i]]
-    d_min, d_max = min(dists), max(dists)
-    beta = max(dist[i, j] for i in range(1, n + 1) for j in range(1, i)) / 5
+    d_min, d_max = served.min(), served.max()
+    beta = inst.max_dist / 5
     print(f"Distance gap        : {d_max - d_min:.2f} (beta={beta:.2f})")
 
     if abs(obj - obj_rep) > 1e-6:
@@ -121,14 +215,31 @@ def verify(instance_file: str, solution_file: str):
         print("Solution verified OK.")
 
 
+def verify_one(pair) -> str:
+    """
+    Verifies one HARDCODED (instance, solution) pair and returns what it
+    printed, so parallel runs can be reported in list order. An exception is
+    reported in that text too, so one bad pair does not cut the report
+    short. Each worker process has its own parse_instance cache, and
+    HARDCODED names every instance once, so batch mode gets nothing from it.
+    """
+    inst, sol = pair
+    root = "FINAL_ROUND_INSTANCES_OPTCHAL2025"
+    out = io.StringIO()
+    with contextlib.redirect_stdout(out):
+        print(f"\n=== Verifying {sol} ===")
+        try:
+            verify(root + "/" + inst, root + "/" + sol)
+        except Exception as e:
+            print(f"ERROR: {type(e).__name__}: {e}")
+    return out.getvalue()
+
+
 if __name__ == "__main__":
     if len(sys.argv) == 1:
-        for inst, sol in HARDCODED:
-            print(f"\n=== Verifying {sol} ===")
-            root = "FINAL_ROUND_INSTANCES_OPTCHAL2025"
-            inst = root + "/" + inst
-            sol = root + "/" + sol
-            verify(inst, sol)
+        with ProcessPoolExecutor() as ex:
+            for result in ex.map(verify_one, HARDCODED):
+                print(result, end="")
     elif len(sys.argv) == 3:
         verify(sys.argv[1], sys.argv[2])
     else: